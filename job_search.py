@@ -1,95 +1,261 @@
-import requests
-from bs4 import BeautifulSoup
-import json
+import aiohttp
+from aiolimiter import AsyncLimiter
+import asyncio
+from selectolax.lexbor import LexborHTMLParser
+import orjson
 from urllib.parse import quote
 import os
+import re
 
-def scrape_linkedin_jobs(queries, location="Worldwide", start_index=0):
+# Concurrency limits for LinkedIn requests (LinkedIn caps guest traffic at ~10 req/10s)
+MAX_CONCURRENT_REQUESTS = 8
+RATE_LIMIT_REQUESTS = 10
+RATE_LIMIT_PERIOD = 10
+MAX_RETRIES = 4
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = {429, 502, 503}
+REQUEST_TIMEOUT = 10
+
+# CSS selectors for the fields extracted from a job posting page
+DETAIL_SELECTORS = {
+    "title": "h2.top-card-layout__title",
+    "organisation_name": "a.topcard__org-name-link",
+    "description": "div.show-more-less-html__markup",
+    "criteria": "ul.description__job-criteria-list",
+    "posted_time": "span.posted-time-ago__text",
+    "applicants": "figcaption.num-applicants__caption, span.num-applicants__caption",
+}
+
+# Collapses the whitespace runs LinkedIn markup leaves in extracted text
+WHITESPACE_RE = re.compile(r"\s+")
+
+# Scraped jobs are stored one JSON object per line and only ever appended to
+JOBS_PATH = "./offers/Jobs_.jsonl"
+# Older runs stored a single JSON array here; it is imported once into JOBS_PATH
+LEGACY_JOBS_PATH = "./offers/Jobs_.txt"
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+    "Accept-Encoding": "gzip, deflate",
+}
+
+
+def create_session():
     """
-    Scrape LinkedIn job postings for multiple queries.
+    Create a pooled keep-alive session to share across scrape calls.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=MAX_CONCURRENT_REQUESTS, keepalive_timeout=30
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers=HEADERS,
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+    )
 
-    Args:
-        queries (list): A list of search queries.
-        location (str): Location to search in (default "Worldwide").
-        start_index (int): Starting index for pagination (default 0).
+
+def create_rate_limits():
+    """
+    Create the concurrency semaphore and rate limiter to share with a session.
+
+    Returns:
+        tuple: (asyncio.Semaphore, AsyncLimiter) bounding all requests made with them.
+    """
+    return (
+        asyncio.Semaphore(MAX_CONCURRENT_REQUESTS),
+        AsyncLimiter(RATE_LIMIT_REQUESTS, RATE_LIMIT_PERIOD),
+    )
+
+
+async def fetch(session, url, sem, limiter):
+    """
+    Fetch a URL and return its body, backing off exponentially on 429/502/503.
 
     Returns:
-        list: A list of job dictionaries with extracted details.
+        str | None: The response text, or None if the request failed.
     """
-    # Load existing jobs if file exists
-    if os.path.exists("./offers/Jobs_.txt"):
-        with open("./offers/Jobs_.txt", "r", encoding="utf-8") as f:
+    async with sem:
+        for attempt in range(MAX_RETRIES):
             try:
-                job_info_lists = json.load(f)
-            except json.JSONDecodeError:
-                job_info_lists = []
-    else:
-        job_info_lists = []
-
-    for query in queries:
-        search_term = quote(query)
-        job_list_url = (
-            f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search"
-            f"?keywords={search_term}&location={quote(location)}"
-            f"&trk=public_jobs_jobs-search-bar_search-submit&pageNum=0&start={start_index}"
-        )
+                await limiter.acquire()
+                async with session.get(url) as response:
+                    if response.status not in RETRY_STATUSES:
+                        if response.status != 200:
+                            print(f"⚠ Failed to fetch '{url}', status: {response.status}")
+                            return None
+                        return await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+            # No point backing off after the last attempt
+            if attempt < MAX_RETRIES - 1:
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+    print(f"⚠ Giving up on '{url}' after {MAX_RETRIES} attempts")
+    return None
 
-        response = requests.get(job_list_url)
-        if response.status_code != 200:
-            print(f"⚠ Failed to fetch jobs for '{query}', status: {response.status_code}")
-            continue
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        page_jobs = soup.find_all("li")
+def safe_text(node):
+    if not node:
+        return "Unknown"
+    return WHITESPACE_RE.sub(" ", node.text(separator=" ", strip=True)).strip()
+
+
+async def fetch_detail(session, job_id, sem, limiter):
+    """
+    Fetch and parse a single LinkedIn job posting.
+
+    Returns:
+        dict | None: The extracted job details, or None if the fetch failed.
+    """
+    job_url = f"https://www.linkedin.com/jobs-guest/jobs/api/jobPosting/{job_id}"
+    job_html = await fetch(session, job_url, sem, limiter)
+    if job_html is None:
+        return None
+
+    tree = LexborHTMLParser(job_html)
+    nodes = {field: tree.css_first(selector) for field, selector in DETAIL_SELECTORS.items()}
+    organisation_tag = nodes["organisation_name"]
+
+    return {
+        "job_id": job_id,
+        "title": safe_text(nodes["title"]),
+        "organisation_name": safe_text(organisation_tag),
+        "organisation_url": organisation_tag.attributes.get("href") if organisation_tag else "Unknown",
+        "description": safe_text(nodes["description"]),
+        "criteria": safe_text(nodes["criteria"]),
+        "url": job_url,
+        "posted_time": safe_text(nodes["posted_time"]),
+        "applicants": safe_text(nodes["applicants"])
+    }
+
+
+def get_job_id(job):
+    """
+    Return a stored job's LinkedIn ID, falling back to its URL for older records.
+    """
+    return job.get("job_id") or job.get("url", "").rsplit("/", 1)[-1]
+
+
+def import_legacy_jobs():
+    """
+    Convert the legacy JSON-array job file to JSONL if JOBS_PATH does not exist yet.
+    """
+    if os.path.exists(JOBS_PATH) or not os.path.exists(LEGACY_JOBS_PATH):
+        return
+    with open(LEGACY_JOBS_PATH, "rb") as f:
+        try:
+            legacy_jobs = orjson.loads(f.read())
+        except orjson.JSONDecodeError:
+            print(f"⚠ Could not parse '{LEGACY_JOBS_PATH}', starting with no stored jobs")
+            return
+    with open(JOBS_PATH, "wb") as f:
+        for job in legacy_jobs:
+            job["job_id"] = get_job_id(job)
+            f.write(orjson.dumps(job) + b"\n")
+    print(f"Imported {len(legacy_jobs)} jobs from '{LEGACY_JOBS_PATH}' into '{JOBS_PATH}'")
+
+
+def iter_jobs(path=JOBS_PATH):
+    """
+    Stream stored jobs one at a time without loading the whole file.
+
+    Yields:
+        dict: A job dictionary per stored line.
+    """
+    if path == JOBS_PATH:
+        import_legacy_jobs()
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield orjson.loads(line)
+
+
+async def scrape_one_query(session, query, location, start_index, sem, limiter, seen):
+    """
+    Scrape one page of results for a single query.
+
+    Args:
+        seen (set): Job IDs already scraped; shared across concurrent queries.
+
+    Returns:
+        list: The newly scraped job dictionaries.
+    """
+    search_term = quote(query)
+    job_list_url = (
+        f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search"
+        f"?keywords={search_term}&location={quote(location)}"
+        f"&trk=public_jobs_jobs-search-bar_search-submit&pageNum=0&start={start_index}"
+    )
 
-        id_lists = []
-        for job in page_jobs:
-            div = job.find("div", class_="base-card")
-            if not div:
-                continue
-            job_id = div.get("data-entity-urn").split(":")[-1]
-            id_lists.append(job_id)
+    page_html = await fetch(session, job_list_url, sem, limiter)
+    if page_html is None:
+        return []
 
-        for job_id in id_lists:
-            job_url = f"https://www.linkedin.com/jobs-guest/jobs/api/jobPosting/{job_id}"
-            job_response = requests.get(job_url)
-            if job_response.status_code != 200:
-                continue
+    tree = LexborHTMLParser(page_html)
 
-            job_soup = BeautifulSoup(job_response.text, 'html.parser')
+    id_lists = []
+    for div in tree.css("div.base-card"):
+        job_id = div.attributes.get("data-entity-urn").split(":")[-1]
+        if job_id in seen:
+            continue
+        seen.add(job_id)
+        id_lists.append(job_id)
 
-            def safe_text(tag):
-                return tag.text.strip() if tag else "Unknown"
+    jobs = await asyncio.gather(
+        *(fetch_detail(session, job_id, sem, limiter) for job_id in id_lists)
+    )
+    return [job for job in jobs if job is not None]
 
-            title = safe_text(job_soup.find("h2", class_="top-card-layout__title"))
-            description = safe_text(job_soup.find("div", class_="show-more-less-html__markup"))
-            criteria = safe_text(job_soup.find("ul", class_="description__job-criteria-list"))
 
-            organisation_tag = job_soup.find("a", class_="topcard__org-name-link")
-            organisation_name = safe_text(organisation_tag)
-            organisation_url = organisation_tag.get("href") if organisation_tag else "Unknown"
+async def scrape_linkedin_jobs_async(
+    queries, location="Worldwide", start_index=0, session=None, rate_limits=None
+):
+    """
+    Scrape LinkedIn job postings for multiple queries concurrently.
 
-            posted_time = safe_text(job_soup.find("span", class_="posted-time-ago__text"))
+    Args:
+        queries (list): A list of search queries.
+        location (str): Location to search in (default "Worldwide").
+        start_index (int): Starting index for pagination (default 0).
+        session (aiohttp.ClientSession): Session to reuse (default: a new one).
+        rate_limits (tuple): `create_rate_limits()` result shared with the session
+            (default: new limits for this call).
 
-            applicants_tag = (
-                job_soup.find("figcaption", class_="num-applicants__caption")
-                or job_soup.find("span", class_="num-applicants__caption")
+    Returns:
+        list: The newly scraped job dictionaries (also appended to JOBS_PATH).
+    """
+    if session is None:
+        async with create_session() as session:
+            return await scrape_linkedin_jobs_async(
+                queries, location, start_index, session, rate_limits=rate_limits
             )
-            applicants = safe_text(applicants_tag)
-
-            job_info_lists.append({
-                "title": title,
-                "organisation_name": organisation_name,
-                "organisation_url": organisation_url,
-                "description": description,
-                "criteria": criteria,
-                "url": job_url,
-                "posted_time": posted_time,
-                "applicants": applicants
-            })
-
-    # Save updated list after all queries
-    with open("./offers/Jobs_.txt", "w", encoding="utf-8") as f:
-        json.dump(job_info_lists, f, ensure_ascii=False, indent=2)
+
+    # Skip postings already scraped by earlier queries or pages
+    seen = {get_job_id(job) for job in iter_jobs()}
+
+    # One semaphore and rate limiter bound all queries' requests together
+    sem, limiter = rate_limits or create_rate_limits()
+    results = await asyncio.gather(
+        *(
+            scrape_one_query(session, query, location, start_index, sem, limiter, seen)
+            for query in queries
+        )
+    )
+
+    job_info_lists = [job for jobs in results for job in jobs]
+    with open(JOBS_PATH, "ab") as f:
+        for job in job_info_lists:
+            f.write(orjson.dumps(job) + b"\n")
 
     return job_info_lists
+
+
+def scrape_linkedin_jobs(queries, location="Worldwide", start_index=0):
+    """
+    Synchronous wrapper around `scrape_linkedin_jobs_async`.
+    """
+    return asyncio.run(scrape_linkedin_jobs_async(queries, location, start_index))
@@ -1,16 +1,41 @@
-import ollama
-import json
-from job_search import scrape_linkedin_jobs
-from pydantic import BaseModel
-from typing import List
+import asyncio
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+from ollama import AsyncClient
+import orjson
+from job_search import (
+    WHITESPACE_RE,
+    create_rate_limits,
+    create_session,
+    get_job_id,
+    iter_jobs,
+    scrape_linkedin_jobs_async,
+)
+from pydantic import BaseModel, ValidationError
+from semantic_cache import SemanticCache
+from sentence_transformers import SentenceTransformer
+from typing import List, Optional
 
 # Constants
 MAX_SCRAPE = 125
+MAX_CONCURRENT_JOBS = 4
+OUTPUT_BUFFER_SIZE = 64 * 1024
+FLUSH_EVERY = 10
+RELEVANT_JOBS_PATH = "./offers/Jobs_relevant.jsonl"
 
-# Model names
-QUERY_MODEL_NAME = "qwen3:0.6b"
-RELEVANCE_MODEL_NAME = "qwen3:0.6b"
-SUMMARY_MODEL_NAME = "qwen3:0.6b"
+# Model names (all steps share one model so it stays loaded once)
+MODEL_NAME = "qwen3:0.6b"
+QUERY_MODEL_NAME = ANALYSIS_MODEL_NAME = MODEL_NAME
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Keep the model resident between calls instead of reloading it
+KEEP_ALIVE = "1h"
+LLM_OPTIONS = {"num_ctx": 2048, "num_predict": 256}
+# The fused analysis emits both summary lists and the explanation in one response
+ANALYSIS_OPTIONS = {**LLM_OPTIONS, "num_predict": 512}
+
+client = AsyncClient()
 
 # --- User profile and keywords ---
 user_profile = """
@@ -49,6 +74,28 @@ excluded_keywords = [
     "Bioinformatics",
 ]
 
+# Near-duplicate postings reuse earlier LLM results instead of re-running the model.
+# Verdicts depend on the profile, keywords and model, so each combination gets its own cache.
+ANALYSIS_CACHE_ID = hashlib.sha256(
+    orjson.dumps([MODEL_NAME, user_profile, keywords, excluded_keywords])
+).hexdigest()[:12]
+embedder = SentenceTransformer(EMBEDDING_MODEL_NAME)
+analysis_cache = SemanticCache(f"./offers/cache/analysis-{ANALYSIS_CACHE_ID}", embedder)
+# Embedding is CPU-bound, so cache lookups run off the event loop
+cache_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS)
+
+# Jobs mentioning an excluded keyword are rejected without calling the LLM
+EXCLUDED_RE = re.compile(
+    r"\b(" + "|".join(map(re.escape, excluded_keywords)) + r")\b", re.IGNORECASE
+)
+
+# Prompt budget for job text; most of the signal is near the start of a posting
+MAX_DESCRIPTION_CHARS = 2000
+MAX_CRITERIA_CHARS = 500
+
+# Matches the relevance verdict in a partially streamed JSON response
+RELEVANT_RE = re.compile(r'"relevant"\s*:\s*(true|false)')
+
 
 # ---------------- Models for structured output ----------------
 class QueryOutput(BaseModel):
@@ -56,33 +103,29 @@ class QueryOutput(BaseModel):
     queries: List[str]
 
 
-class RelevanceResult(BaseModel):
-    relevant: bool
-    explanation: str
-    confidence: float
-
-
-class JobSummary(BaseModel):
+class JobAnalysis(BaseModel):
     key_requirements: List[str]
     role_details: List[str]
+    relevant: bool
+    confidence: float
+    explanation: str
 
 
-# --- Step 1: Generate search queries and detect location ---
-def generate_queries(
-    user_profile: str, keywords: List[str], excluded_keywords: List[str]
-) -> QueryOutput:
+# Schemas and prompts are built once and filled in per call
+QUERY_SCHEMA = QueryOutput.model_json_schema()
+ANALYSIS_SCHEMA = JobAnalysis.model_json_schema()
 
-    query_prompt = f"""
+QUERY_PROMPT_TEMPLATE = """
 You create short, realistic search queries for job or academic opportunities.
 
 User profile:
 {user_profile}
 
 INCLUDE keywords:
-{", ".join(keywords)}
+{keywords}
 
 EXCLUDE keywords:
-{", ".join(excluded_keywords)}
+{excluded_keywords}
 
 Rules:
 0. Generate an extremely large and diverse list of queries** that could realistically appear in search engines, job boards, and academic listings.
@@ -102,39 +145,25 @@ Output JSON only:
 }}
 """
 
-    query_response = ollama.chat(
-        model=QUERY_MODEL_NAME,
-        messages=[{"role": "user", "content": query_prompt}],
-        format=QueryOutput.model_json_schema(),
-    )
-
-    queries_data = QueryOutput.model_validate_json(query_response.message.content)
-    return queries_data
-
-
-# --- Step 2: Scrape jobs ---
-def get_job_offers(queries: List[str], location: str):
-    for i in range(0, MAX_SCRAPE, 25):
-        scrape_linkedin_jobs(queries, location, i)
-
-
-# --- Step 3: Relevance check ---
-def is_job_relevant(
-    job: dict, user_profile: str, keywords: List[str], excluded_keywords: List[str]
-) -> RelevanceResult:
+ANALYSIS_PROMPT_TEMPLATE = """
+You are an assistant that analyzes job postings.
 
-    relevance_prompt = f"""
 User profile:
 {user_profile}
 
-Included Keywords: {", ".join(keywords)}
-Excluded Keywords: {", ".join(excluded_keywords)}
+Included Keywords: {keywords}
+Excluded Keywords: {excluded_keywords}
 
 Job posting:
-Title: {job['title']}
-Summary: {job['summary']}
+Title: {title}
+Description: {description}
+Criteria: {criteria}
 
-Decide if this job matches the user's career field and level.
+Task 1 - Summarize the posting into concise bullet points:
+1. Key Requirements - technical skills, degrees, certifications, and experience required.
+2. Role Details - main responsibilities, daily tasks, and objectives.
+
+Task 2 - Decide if this job matches the user's career field and level.
 
 Rules:
 - Primary check: Does the role belong to the same career field as the user’s goals? If not, irrelevant.
@@ -145,92 +174,199 @@ Rules:
 
 Output JSON:
 {{
+    "key_requirements": ["<requirement>", ...],
+    "role_details": ["<detail>", ...],
     "relevant": true/false,
     "confidence": float 0-1,
     "explanation": "1-2 sentences explaining how career field, level, and keywords influenced the decision."
 }}
 """
 
-    response = ollama.chat(
-        model=RELEVANCE_MODEL_NAME,
-        messages=[{"role": "user", "content": relevance_prompt}],
-        format=RelevanceResult.model_json_schema(),
+
+# --- Step 1: Generate search queries and detect location ---
+async def generate_queries(
+    user_profile: str, keywords: List[str], excluded_keywords: List[str]
+) -> QueryOutput:
+
+    query_prompt = QUERY_PROMPT_TEMPLATE.format(
+        user_profile=user_profile,
+        keywords=", ".join(keywords),
+        excluded_keywords=", ".join(excluded_keywords),
     )
-    relevance = RelevanceResult.model_validate_json(response.message.content)
-    return relevance
 
+    # The query list is long, so neither context nor output size is capped here
+    query_response = await client.chat(
+        model=QUERY_MODEL_NAME,
+        messages=[{"role": "user", "content": query_prompt}],
+        format=QUERY_SCHEMA,
+        keep_alive=KEEP_ALIVE,
+    )
 
-# --- Step 4: Summarizer ---
-def get_summary(job: dict) -> JobSummary:
-    summary_system = """
-You are an assistant that analyzes job postings.
-Summarize each posting into:
-1. Key Requirements - technical skills, degrees, certifications, and experience required.
-2. Role Details - main responsibilities, daily tasks, and objectives.
-Keep it concise in bullet points.
-"""
-    job_text = f"""
-Title: {job['title']}
-Description: {job['description']}
-Criteria: {job['criteria']}
-"""
-    response = ollama.chat(
-        model=SUMMARY_MODEL_NAME,
-        messages=[
-            {"role": "system", "content": summary_system},
-            {"role": "user", "content": job_text},
-        ],
-        format=JobSummary.model_json_schema(),
+    queries_data = QueryOutput.model_validate_json(query_response.message.content)
+    return queries_data
+
+
+# --- Step 2: Scrape jobs ---
+async def get_job_offers(queries: List[str], location: str):
+    # Every page shares one rate budget, so consecutive calls don't each get a fresh burst
+    rate_limits = create_rate_limits()
+    async with create_session() as session:
+        for i in range(0, MAX_SCRAPE, 25):
+            await scrape_linkedin_jobs_async(queries, location, i, session, rate_limits)
+
+
+# --- Step 3: Summarize and check relevance ---
+def trim_text(text: str, max_chars: int) -> str:
+    # Newly scraped text is already normalized; this also covers older records
+    return WHITESPACE_RE.sub(" ", text).strip()[:max_chars]
+
+
+async def analyze_job(
+    job: dict, user_profile: str, keywords: List[str], excluded_keywords: List[str]
+) -> JobAnalysis:
+
+    description = trim_text(job["description"], MAX_DESCRIPTION_CHARS)
+    analysis_prompt = ANALYSIS_PROMPT_TEMPLATE.format(
+        user_profile=user_profile,
+        keywords=", ".join(keywords),
+        excluded_keywords=", ".join(excluded_keywords),
+        title=job["title"],
+        description=description,
+        criteria=trim_text(job["criteria"], MAX_CRITERIA_CHARS),
     )
-    return JobSummary.model_validate_json(response.message.content)
+
+    cached, cache_vec = await asyncio.get_running_loop().run_in_executor(
+        cache_executor,
+        analysis_cache.lookup,
+        f"{job['title']}\n{description}",
+    )
+    if cached is not None:
+        return JobAnalysis.model_validate(cached)
+
+    # Stream the response so rejected jobs stop before the explanation is generated
+    stream = await client.chat(
+        model=ANALYSIS_MODEL_NAME,
+        messages=[{"role": "user", "content": analysis_prompt}],
+        format=ANALYSIS_SCHEMA,
+        keep_alive=KEEP_ALIVE,
+        options=ANALYSIS_OPTIONS,
+        stream=True,
+    )
+    content = ""
+    analysis = None
+    async for chunk in stream:
+        content += chunk.message.content
+        match = RELEVANT_RE.search(content)
+        if match and match.group(1) == "false":
+            await stream.aclose()
+            analysis = JobAnalysis.model_validate_json(
+                content[: match.end()] + ', "confidence": 0.0, "explanation": ""}'
+            )
+            break
+    if analysis is None:
+        analysis = JobAnalysis.model_validate_json(content)
+    analysis_cache.add(cache_vec, analysis.model_dump())
+    return analysis
+
+
+# --- Step 4: Process jobs ---
+def is_excluded(job: dict) -> bool:
+    return bool(
+        EXCLUDED_RE.search(job["title"])
+        or EXCLUDED_RE.search(job.get("description", "")[:1000])
+    )
+
+
+async def process_job(job_data: dict, sem: asyncio.Semaphore) -> Optional[dict]:
+    async with sem:
+        try:
+            analysis = await analyze_job(
+                job_data, user_profile, keywords, excluded_keywords
+            )
+        except ValidationError as e:
+            # A truncated or malformed generation only skips this job
+            print(
+                f"⚠ Skipping '{job_data['title']}': invalid model output "
+                f"({e.error_count()} errors)"
+            )
+            return None
+
+    print("\nkey_requirements", analysis.key_requirements, "\n")
+    print("role_details", analysis.role_details, "\n")
+    print("relevant: ", analysis.relevant, "\n")
+    print("confidence: ", analysis.confidence, "\n")
+    print("explanation: ", analysis.explanation, "\n")
+
+    record = {
+        **job_data,
+        "summary": {
+            "key_requirements": analysis.key_requirements,
+            "role_details": analysis.role_details,
+        },
+        "relevance": {
+            "relevant": analysis.relevant,
+            "confidence": analysis.confidence,
+            "explanation": analysis.explanation,
+        },
+    }
+    return record
+
+
+async def process_jobs(job_info_lists: List[dict], out) -> List[dict]:
+    sem = asyncio.Semaphore(MAX_CONCURRENT_JOBS)
+    tasks = [
+        asyncio.ensure_future(process_job(job_data, sem)) for job_data in job_info_lists
+    ]
+    # Write records as they finish; flush periodically so a crash loses little
+    written = 0
+    for task in asyncio.as_completed(tasks):
+        record = await task
+        if record is None:
+            continue
+        out.write(orjson.dumps(record) + b"\n")
+        written += 1
+        if written % FLUSH_EVERY == 0:
+            out.flush()
+    return [record for record in (task.result() for task in tasks) if record is not None]
 
 
 # ------------------- Main pipeline -------------------
-if __name__ == "__main__":
+async def main():
+    # Load the model once up front; every later call reuses it
+    await client.generate(model=MODEL_NAME, prompt="", keep_alive=KEEP_ALIVE)
+
     # 1. Generate queries
-    queries_data = generate_queries(user_profile, keywords, excluded_keywords)
+    queries_data = await generate_queries(user_profile, keywords, excluded_keywords)
     location = queries_data.location
     queries = queries_data.queries
-    
+
     print("Queries: ",queries)
     print("Location: ", location)
     # 2. Scrape jobs
-    get_job_offers(queries, location)
-
-    # 3. Load scraped jobs
-    with open("./offers/Jobs_.txt", "r", encoding="utf-8") as f:
-        job_info_lists = json.load(f)
-
-    jobs_summary = []
-    # 4. Process each job
-    for job_data in job_info_lists:
-        summary = get_summary(job_data)
-        print("\nkey_requirements", summary.key_requirements, "\n")
-        print("role_details", summary.role_details, "\n")
-
-        relevance_result = is_job_relevant(
-            {**job_data, "summary": summary}, user_profile, keywords, excluded_keywords
-        )
-        print("relevant: ", relevance_result.relevant, "\n")
-        print("confidence: ", relevance_result.confidence, "\n")
-        print("explanation: ", relevance_result.explanation, "\n")
-
-        jobs_summary.append(
-            {
-                **job_data,
-                "summary": {
-                    "key_requirements": summary.key_requirements,
-                    "role_details": summary.role_details,
-                },
-                "relevance": {
-                    "relevant": relevance_result.relevant,
-                    "confidence": relevance_result.confidence,
-                    "explanation": relevance_result.explanation,
-                },
-            }
-        )
-        # 5. Save all results
-        with open("./offers/Jobs_relevant_.json", "w", encoding="utf-8") as f:
-            json.dump(jobs_summary, f, ensure_ascii=False, indent=2)
+    await get_job_offers(queries, location)
+
+    # 3. Load scraped jobs that have no record from an earlier run
+    processed = {get_job_id(record): record for record in iter_jobs(RELEVANT_JOBS_PATH)}
+    job_info_lists = [
+        job
+        for job in iter_jobs()
+        if get_job_id(job) not in processed and not is_excluded(job)
+    ]
+
+    # 4. Process jobs concurrently, appending each record as it completes
+    with open(RELEVANT_JOBS_PATH, "ab", buffering=OUTPUT_BUFFER_SIZE) as out:
+        new_records = await process_jobs(job_info_lists, out)
+    jobs_summary = [*processed.values(), *new_records]
+
+    # 5. Save all results
+    with open("./offers/Jobs_relevant_.json", "wb") as f:
+        f.write(orjson.dumps(jobs_summary, option=orjson.OPT_INDENT_2))
+
+    analysis_cache.save()
+    cache_executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
 
 print("End.")
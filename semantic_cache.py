@@ -0,0 +1,66 @@
+import os
+import threading
+import faiss
+import numpy as np
+import orjson
+
+
+class SemanticCache:
+    """
+    Similarity cache for LLM results, keyed on sentence embeddings.
+
+    A prompt key whose embedding has cosine similarity >= threshold with a
+    stored key returns the stored result instead of calling the model.
+    """
+
+    def __init__(self, path, embedder, threshold=0.95):
+        """
+        Args:
+            path (str): File prefix used to persist the index and results.
+            embedder (SentenceTransformer): Model used to embed cache keys.
+            threshold (float): Minimum cosine similarity for a hit (default 0.95).
+        """
+        self.index_path = f"{path}.faiss"
+        self.results_path = f"{path}.json"
+        self.embedder = embedder
+        self.threshold = threshold
+        # Lookups may run on worker threads while results are being added
+        self.lock = threading.Lock()
+
+        if os.path.exists(self.index_path) and os.path.exists(self.results_path):
+            self.index = faiss.read_index(self.index_path)
+            with open(self.results_path, "rb") as f:
+                self.results = orjson.loads(f.read())
+        else:
+            self.index = faiss.IndexFlatIP(embedder.get_sentence_embedding_dimension())
+            self.results = []
+
+    def embed(self, key):
+        vec = self.embedder.encode([key], convert_to_numpy=True).astype(np.float32)
+        faiss.normalize_L2(vec)
+        return vec
+
+    def lookup(self, key):
+        """
+        Returns:
+            tuple: (cached result or None, embedding of key for a later `add`).
+        """
+        vec = self.embed(key)
+        with self.lock:
+            if self.index.ntotal:
+                scores, ids = self.index.search(vec, 1)
+                if scores[0, 0] >= self.threshold:
+                    return self.results[ids[0, 0]], vec
+        return None, vec
+
+    def add(self, vec, result):
+        with self.lock:
+            self.index.add(vec)
+            self.results.append(result)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        with self.lock:
+            faiss.write_index(self.index, self.index_path)
+            with open(self.results_path, "wb") as f:
+                f.write(orjson.dumps(self.results))